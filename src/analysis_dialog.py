@@ -0,0 +1,169 @@
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QTabWidget, QTableView,
+    QPushButton, QWidget, QFileDialog, QMessageBox, QHeaderView
+)
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QRectF
+from PyQt5.QtGui import QPainter, QColor
+import numpy as np
+import graph_analysis as ga
+
+PAGE_SIZE = 500
+EXPORT_FILTER = "NumPy array (*.npy);;CSV (*.csv)"
+TABLE_STYLE = "background-color: #222222; color: white; gridline-color: #444444;"
+
+
+class ArrayTableModel(QAbstractTableModel):
+    """Read-only table over equal-length numpy columns.
+
+    Rows are exposed a page at a time and cells are formatted only when the
+    view asks for them, so huge graphs cost nothing until scrolled into view.
+    """
+
+    def __init__(self, headers, columns, parent=None):
+        super().__init__(parent)
+        self.headers = headers
+        self.columns = columns
+        self.total = len(columns[0]) if columns else 0
+        self.loaded = min(PAGE_SIZE, self.total)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.loaded
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and index.isValid():
+            return str(self.columns[index.column()][index.row()])
+        if role == Qt.TextAlignmentRole:
+            return Qt.AlignRight | Qt.AlignVCenter
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.headers[section]
+        return super().headerData(section, orientation, role)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.loaded < self.total
+
+    def fetchMore(self, parent=QModelIndex()):
+        extra = min(PAGE_SIZE, self.total - self.loaded)
+        self.beginInsertRows(QModelIndex(), self.loaded, self.loaded + extra - 1)
+        self.loaded += extra
+        self.endInsertRows()
+
+
+class HistogramWidget(QWidget):
+    """Bar chart of vertex counts per degree."""
+
+    def __init__(self, counts, parent=None):
+        super().__init__(parent)
+        self.counts = counts
+        self.setMinimumHeight(160)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor('#222222'))
+        if len(self.counts) == 0 or self.counts.max() == 0:
+            return
+        w = self.width() / len(self.counts)
+        h = self.height() - 4
+        peak = self.counts.max()
+        for d, c in enumerate(self.counts):
+            bar = h * c / peak
+            painter.fillRect(QRectF(d * w, h - bar, max(w - 1, 1), bar), QColor('#4363d8'))
+
+
+class AnalysisDialog(QDialog):
+    def __init__(self, G, info, parent=None, labels=None):
+        """labels[i] is the scene index shown for node i of G (default: i)."""
+        super().__init__(parent)
+        self.G = G
+        self.info = info
+        self.labels = np.arange(info['num_vertices']) if labels is None else np.asarray(labels)
+        self.setWindowTitle("Graph Analysis")
+        self.resize(700, 600)
+        self.setStyleSheet("background-color: #333333; color: white;")
+
+        layout = QVBoxLayout(self)
+        summary = QLabel(ga.format_info(info), self)
+        summary.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        summary.setStyleSheet("font-family: Consolas; font-size: 11pt;")
+        layout.addWidget(summary)
+
+        tabs = QTabWidget(self)
+        tabs.addTab(self._degree_tab(), "Degree Distribution")
+        tabs.addTab(self._table(*self._vertex_columns()), "Vertices")
+        sizes = np.array([len(c) for c in info['components']], dtype=np.int64)
+        tabs.addTab(self._table(["Component", "Size"], [np.arange(len(sizes)), sizes]), "Components")
+        if not info['is_directed']:
+            bridges = np.array(info['bridges'], dtype=np.int64).reshape(-1, 2)
+            bridges = self.labels[bridges]
+            tabs.addTab(self._table(["Vertex", "Vertex"], [bridges[:, 0], bridges[:, 1]]), "Bridges")
+        layout.addWidget(tabs)
+
+        buttons = QHBoxLayout()
+        for name, func in [
+            ("Export Adjacency", self.export_adjacency),
+            ("Export Laplacian", self.export_laplacian),
+            ("Export Spectrum", self.export_spectrum),
+        ]:
+            btn = QPushButton(name, self)
+            btn.clicked.connect(func)
+            buttons.addWidget(btn)
+        layout.addLayout(buttons)
+
+    def _table(self, headers, columns):
+        view = QTableView(self)
+        view.setModel(ArrayTableModel(headers, columns, view))
+        view.setStyleSheet(TABLE_STYLE)
+        view.verticalHeader().setVisible(False)
+        view.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        return view
+
+    def _degree_tab(self):
+        counts = self.info['degree_histogram']
+        tab = QWidget(self)
+        layout = QVBoxLayout(tab)
+        layout.addWidget(HistogramWidget(counts, tab))
+        nonzero = np.flatnonzero(counts)
+        layout.addWidget(self._table(["Degree", "Vertices"], [nonzero, counts[nonzero]]))
+        return tab
+
+    def _vertex_columns(self):
+        info = self.info
+        component = np.empty(info['num_vertices'], dtype=np.int64)
+        for idx, comp in enumerate(info['components']):
+            component[list(comp)] = idx
+        vertex = self.labels
+        if info['is_directed']:
+            return (["Vertex", "In-degree", "Out-degree", "Component"],
+                    [vertex, info['in_degrees'], info['out_degrees'], component])
+        return ["Vertex", "Degree", "Component"], [vertex, info['degrees'], component]
+
+    def export_adjacency(self):
+        self._export("Export Adjacency Matrix", lambda: ga.adjacency_matrix(self.G))
+
+    def export_laplacian(self):
+        self._export("Export Laplacian Matrix", lambda: ga.laplacian_matrix(self.G))
+
+    def export_spectrum(self):
+        def spectrum():
+            # Eigenvalues form the first row, eigenvectors the columns below.
+            ev, evecs = ga.laplacian_spectrum(self.G, vectors=True)
+            return np.vstack([ev, evecs])
+        self._export("Export Laplacian Spectrum", spectrum)
+
+    def _export(self, title, compute):
+        path, selected = QFileDialog.getSaveFileName(self, title, "", EXPORT_FILTER)
+        if not path:
+            return
+        try:
+            array = compute()
+            if path.endswith('.csv') or selected.startswith('CSV'):
+                np.savetxt(path, array, delimiter=',')
+            else:
+                np.save(path, array)
+        except (OSError, MemoryError, np.linalg.LinAlgError) as e:
+            QMessageBox.warning(self, "Error", f"Cannot export.\n{str(e)}")
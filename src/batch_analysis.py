@@ -0,0 +1,277 @@
+"""Headless batch analysis of graph files.
+
+    python batch_analysis.py graphs/ --metrics components,bridges -o out.jsonl
+
+Each file is analyzed in a worker process; one result row per file is
+streamed as soon as it is ready, as JSON Lines (default) or Parquet.
+"""
+import argparse
+import collections
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+import graph_analysis as ga
+import sketch_io
+
+PARQUET_BATCH = 256
+
+
+class MetricTimeout(Exception):
+    pass
+
+
+class MetricFailed(Exception):
+    pass
+
+
+def _metric_child(conn, name, G):
+    try:
+        conn.send(('ok', ga.METRICS[name](G)))
+    except Exception as e:
+        conn.send(('error', f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
+
+
+def _run_metric(name, G, timeout):
+    # With a timeout the metric runs in its own child process, which is
+    # killed when time is up; unlike a signal this also stops long C calls
+    # (LAPACK), and a child that crashes or is OOM-killed only fails this
+    # metric.
+    if not timeout:
+        return ga.METRICS[name](G)
+    recv, send = multiprocessing.Pipe(duplex=False)
+    child = multiprocessing.Process(target=_metric_child, args=(send, name, G), daemon=True)
+    child.start()
+    send.close()
+    try:
+        if not recv.poll(timeout):
+            raise MetricTimeout()
+        status, value = recv.recv()
+    except EOFError:
+        child.join()
+        raise MetricFailed(f"metric process died (exit code {child.exitcode})")
+    finally:
+        child.kill()
+        child.join()
+        recv.close()
+    if status == 'error':
+        raise MetricFailed(value)
+    return value
+
+
+def _empty_row(path):
+    return {'file': path, 'vertices': None, 'edges': None, 'directed': None, 'errors': {}}
+
+
+def analyze_file(path, metrics, timeout=None):
+    """Compute the selected metrics for one graph file as a result row."""
+    row = _empty_row(path)
+    try:
+        G = sketch_io.read_graph(path)
+    except Exception as e:
+        row['errors']['load'] = f"{type(e).__name__}: {e}"
+        return row
+    row.update(vertices=G.number_of_nodes(), edges=G.number_of_edges(), directed=G.is_directed())
+
+    for name in metrics:
+        start = time.perf_counter()
+        try:
+            row[name] = _run_metric(name, G, timeout)
+        except MetricTimeout:
+            row[name] = None
+            row['errors'][name] = f"timed out after {timeout}s"
+        except MetricFailed as e:
+            row[name] = None
+            row['errors'][name] = str(e)
+        except Exception as e:
+            row[name] = None
+            row['errors'][name] = f"{type(e).__name__}: {e}"
+        row.setdefault('seconds', {})[name] = round(time.perf_counter() - start, 6)
+    return row
+
+
+def _analyze_chunk(work, paths):
+    return [work(path) for path in paths]
+
+
+def _isolate(work, paths):
+    # Run suspects one at a time in a single-worker pool, so a crash can
+    # only be blamed on the file that caused it.
+    pool = None
+    try:
+        for path in paths:
+            if pool is None:
+                pool = ProcessPoolExecutor(1)
+            try:
+                yield pool.submit(work, path).result()
+            except BrokenProcessPool:
+                pool.shutdown()
+                pool = None
+                row = _empty_row(path)
+                row['errors']['worker'] = "worker process died"
+                yield row
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+
+def analyze_all(files, work, workers, chunksize=1):
+    """Yield work(path) rows as they finish, surviving worker crashes.
+
+    Files go to the workers in chunks. A worker that dies breaks the whole
+    pool and fails every chunk in flight with BrokenProcessPool; the pool is
+    rebuilt for the remaining chunks, and the files of the failed chunks are
+    rerun one by one at the end. Only a file that kills a worker on its own
+    gets an error row.
+    """
+    pending = collections.deque(files[i:i + chunksize] for i in range(0, len(files), chunksize))
+    suspects = []
+    while pending:
+        with ProcessPoolExecutor(workers) as pool:
+            running = {}
+            broken = False
+            while pending or running:
+                # No more chunks in flight than workers, so a crash only
+                # implicates chunks that were actually running.
+                while pending and not broken and len(running) < workers:
+                    chunk = pending.popleft()
+                    running[pool.submit(_analyze_chunk, work, chunk)] = chunk
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    chunk = running.pop(future)
+                    try:
+                        yield from future.result()
+                    except BrokenProcessPool:
+                        broken = True
+                        suspects.extend(chunk)
+    yield from _isolate(work, suspects)
+
+
+def find_graph_files(paths):
+    """Expand directories into the graph files they contain, recursively."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, n) for n in sorted(names)
+                             if n.lower().endswith(sketch_io.GRAPH_EXTENSIONS))
+        else:
+            files.append(path)
+    return files
+
+
+class JsonLinesWriter:
+    def __init__(self, out):
+        self.out = out
+
+    def write(self, row):
+        self.out.write(json.dumps(row) + '\n')
+        self.out.flush()
+
+    def close(self):
+        pass
+
+
+class ParquetWriter:
+    """Buffers rows into Parquet row groups; metric values are stored as JSON."""
+
+    def __init__(self, path, metrics):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Parquet output requires pyarrow (pip install pyarrow).")
+        self.pa = pa
+        self.metrics = metrics
+        self.schema = pa.schema(
+            [('file', pa.string()), ('vertices', pa.int64()), ('edges', pa.int64()),
+             ('directed', pa.bool_())]
+            + [(m, pa.string()) for m in metrics]
+            + [('errors', pa.string()), ('seconds', pa.string())])
+        self.writer = pq.ParquetWriter(path, self.schema)
+        self.rows = []
+
+    def write(self, row):
+        flat = {k: row.get(k) for k in ('file', 'vertices', 'edges', 'directed')}
+        for key in list(self.metrics) + ['errors', 'seconds']:
+            flat[key] = json.dumps(row.get(key))
+        self.rows.append(flat)
+        if len(self.rows) >= PARQUET_BATCH:
+            self._flush()
+
+    def _flush(self):
+        if self.rows:
+            self.writer.write_table(self.pa.Table.from_pylist(self.rows, schema=self.schema))
+            self.rows = []
+
+    def close(self):
+        self._flush()
+        self.writer.close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze many graph files in parallel.")
+    parser.add_argument('paths', nargs='+',
+                        help="graph files or folders (%s)" % ', '.join(sketch_io.GRAPH_EXTENSIONS))
+    parser.add_argument('--metrics', default=','.join(ga.METRICS),
+                        help="comma-separated metrics to compute (default: %(default)s)")
+    parser.add_argument('--timeout', type=float, default=None,
+                        help="per-metric time limit in seconds; each metric then runs in "
+                             "its own process")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help="worker processes (default: %(default)s)")
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help="files handed to a worker at a time (default: automatic)")
+    parser.add_argument('--format', choices=('jsonl', 'parquet'), default='jsonl')
+    parser.add_argument('-o', '--output', default=None,
+                        help="output file (default: stdout for jsonl)")
+    args = parser.parse_args(argv)
+
+    args.metrics = [m.strip() for m in args.metrics.split(',') if m.strip()]
+    unknown = [m for m in args.metrics if m not in ga.METRICS]
+    if unknown:
+        parser.error(f"unknown metrics: {', '.join(unknown)} (choose from {', '.join(ga.METRICS)})")
+    if args.format == 'parquet' and not args.output:
+        parser.error("--format parquet requires --output")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    files = find_graph_files(args.paths)
+    if not files:
+        print("No graph files found.", file=sys.stderr)
+        return 1
+
+    workers = max(1, min(args.workers or 1, len(files)))
+    chunksize = args.chunksize or max(1, len(files) // (workers * 4))
+    work = partial(analyze_file, metrics=args.metrics, timeout=args.timeout)
+
+    if args.format == 'parquet':
+        writer = ParquetWriter(args.output, args.metrics)
+        out = None
+    else:
+        out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+        writer = JsonLinesWriter(out)
+
+    try:
+        for row in analyze_all(files, work, workers, chunksize):
+            writer.write(row)
+    finally:
+        writer.close()
+        if out is not None and out is not sys.stdout:
+            out.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
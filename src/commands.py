@@ -0,0 +1,94 @@
+from PyQt5.QtWidgets import QUndoCommand
+from PyQt5.QtCore import QPointF
+
+
+class AddItemsCommand(QUndoCommand):
+    """Vertices and edges entering the scene."""
+
+    def __init__(self, scene, vertices, edges, text="Add Items"):
+        super().__init__(text)
+        self.scene = scene
+        self.vertices = list(vertices)
+        self.edges = list(edges)
+
+    def redo(self):
+        self.scene._attach(self.vertices, self.edges)
+
+    def undo(self):
+        self.scene._detach(self.vertices, self.edges)
+
+
+class RemoveItemsCommand(QUndoCommand):
+    """Vertices and edges leaving the scene.
+
+    Only the removed items and their list indices are kept, so undo costs
+    the same as the removal itself and restores the original ordering.
+    """
+
+    def __init__(self, scene, vertices, edges, text="Delete"):
+        super().__init__(text)
+        self.scene = scene
+        self.vertices = list(vertices)
+        self.edges = list(edges)
+        self.vertex_slots = []
+        self.edge_slots = []
+
+    def redo(self):
+        self.vertex_slots, self.edge_slots = self.scene._detach(self.vertices, self.edges)
+
+    def undo(self):
+        self.scene._restore(self.vertex_slots, self.edge_slots)
+
+
+class MoveVerticesCommand(QUndoCommand):
+    """Position changes made in one step (a drag, a layout).
+
+    Commands never merge with each other; an extendable one (a drag) may
+    instead absorb the physics settling that follows it while it is on top.
+    """
+
+    def __init__(self, scene, moves, text="Move", extendable=False):
+        super().__init__(text)
+        self.scene = scene
+        self.moves = moves  # vertex -> [old pos, new pos]
+        self.extendable = extendable
+        self._pushed = False
+
+    def extend(self, moves):
+        for v, (old, new) in moves.items():
+            if v in self.moves:
+                self.moves[v][1] = new
+            else:
+                self.moves[v] = [old, new]
+
+    def _apply(self, which):
+        for v, pos in self.moves.items():
+            v.setPos(pos[which])
+            v.velocity = QPointF(0, 0)
+        self.scene._log_moves(self.moves)
+
+    def redo(self):
+        # The moves already happened when the command is first pushed.
+        if self._pushed:
+            self._apply(1)
+        self._pushed = True
+
+    def undo(self):
+        self._apply(0)
+
+
+class ColorCommand(QUndoCommand):
+    """Change of the user-chosen color of a vertex or edge."""
+
+    def __init__(self, scene, item, color, text="Change Color"):
+        super().__init__(text)
+        self.scene = scene
+        self.item = item
+        self.old = item.user_color()
+        self.new = color
+
+    def redo(self):
+        self.scene._set_color(self.item, self.new)
+
+    def undo(self):
+        self.scene._set_color(self.item, self.old)
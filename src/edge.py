@@ -1,7 +1,8 @@
 from PyQt5.QtWidgets import QGraphicsPathItem, QGraphicsItem
-from PyQt5.QtGui import QPainterPath, QPen, QColor, QPolygonF, QPainterPathStroker
+from PyQt5.QtGui import QPainterPath, QPolygonF, QPainterPathStroker
 from PyQt5.QtCore import QPointF, Qt
 import math
+import styles
 
 class Edge(QGraphicsPathItem):
     def __init__(self, v1, v2, directed=False):
@@ -10,14 +11,14 @@ class Edge(QGraphicsPathItem):
         self.vertex2 = v2
         self.directed = directed
 
-        self.default_pen = QPen(QColor('black'), 2)
-        self.default_pen.setCapStyle(Qt.RoundCap)
-        self.default_pen.setJoinStyle(Qt.RoundJoin)
+        self.default_pen = styles.default_edge_pen()
 
         self.user_pen = None   # User-set permanent pen
         self.temp_pen = None   # Temporary pen (e.g., for highlighting)
+        self.uid = None        # assigned by the scene, stable across undo/redo
 
         self.setPen(self.default_pen)
+        self.applied_pen = self.default_pen
         self.setFlag(QGraphicsItem.ItemIsSelectable, True)
         self.setAcceptedMouseButtons(Qt.LeftButton)
 
@@ -45,17 +46,16 @@ class Edge(QGraphicsPathItem):
         return stroker.createStroke(self.path())
 
     def set_color(self, color):
-        """Set a permanent user color (right-click)."""
-        self.user_pen = QPen(color, 2)
-        self.user_pen.setCapStyle(Qt.RoundCap)
-        self.user_pen.setJoinStyle(Qt.RoundJoin)
+        """Set a permanent user color (right-click); None clears it."""
+        self.user_pen = styles.pen(color, role='user') if color is not None else None
         self.update_pen()
 
+    def user_color(self):
+        return self.user_pen.color() if self.user_pen else None
+
     def set_temp_color(self, color):
         """Temporarily highlight the edge with a color (e.g., bridge)."""
-        self.temp_pen = QPen(color, 2)
-        self.temp_pen.setCapStyle(Qt.RoundCap)
-        self.temp_pen.setJoinStyle(Qt.RoundJoin)
+        self.temp_pen = styles.pen(color, role='temp')
         self.update_pen()
 
     def reset_temp_color(self):
@@ -67,16 +67,15 @@ class Edge(QGraphicsPathItem):
         """Fully reset to default black edge."""
         self.user_pen = None
         self.temp_pen = None
-        self.setPen(self.default_pen)
+        self.update_pen()
 
     def update_pen(self):
         """Priority: temp_pen > user_pen > default_pen."""
-        if self.temp_pen:
-            self.setPen(self.temp_pen)
-        elif self.user_pen:
-            self.setPen(self.user_pen)
-        else:
-            self.setPen(self.default_pen)
+        pen = self.temp_pen or self.user_pen or self.default_pen
+        # Pens are interned, so an unchanged style is the very same object.
+        if pen is not self.applied_pen:
+            self.setPen(pen)
+            self.applied_pen = pen
 
     def _add_arrow(self, path, start, end):
         vec = end - start
@@ -1,59 +1,128 @@
 import networkx as nx
 import numpy as np
 
-def build_graph(scene):
-    """Build a NetworkX graph from the scene."""
-    directed = any(getattr(e, 'directed', False) for e in scene.edges)
+SPECTRUM_PREVIEW_LIMIT = 2000
+SPECTRUM_METRIC_LIMIT = 5000  # dense Laplacian: 200 MB at this size
+
+def graph_from_edges(n, edges, directed=False):
+    """Build a NetworkX multigraph on nodes 0..n-1 from index pairs."""
     G = nx.MultiDiGraph() if directed else nx.MultiGraph()
-    for v in scene.vertices:
-        G.add_node(id(v))
-    for e in scene.edges:
-        G.add_edge(id(e.vertex1), id(e.vertex2))
+    G.add_nodes_from(range(n))
+    G.add_edges_from(edges)
     return G
 
+def scene_arrays(scene):
+    """Return vertex centers, an (m, 2) edge index array and directedness."""
+    index = {v: i for i, v in enumerate(scene.vertices)}
+    centers = (v.pos() + v.get_center() for v in scene.vertices)
+    pos = np.array([(c.x(), c.y()) for c in centers], dtype=float).reshape(-1, 2)
+    edges = np.array([(index[e.vertex1], index[e.vertex2]) for e in scene.edges],
+                     dtype=np.int64).reshape(-1, 2)
+    directed = any(getattr(e, 'directed', False) for e in scene.edges)
+    return pos, edges, directed
+
+def simple_graph(G):
+    """Undirected simple graph on the same nodes, used for matrices and bridges."""
+    simpleG = nx.Graph()
+    simpleG.add_nodes_from(G.nodes())
+    simpleG.add_edges_from(G.edges())
+    return simpleG
+
+def adjacency_matrix(G):
+    """Dense adjacency matrix of the simple graph of G."""
+    return nx.to_numpy_array(simple_graph(G))
+
+def laplacian_matrix(G):
+    A = adjacency_matrix(G)
+    return np.diag(A.sum(axis=1)) - A
+
+def laplacian_spectrum(G, vectors=False):
+    """Laplacian eigenvalues in ascending order, plus eigenvectors if asked."""
+    L = laplacian_matrix(G)
+    return np.linalg.eigh(L) if vectors else np.linalg.eigvalsh(L)
+
+def spectrum_values(G):
+    """Laplacian eigenvalues as a list, refused above SPECTRUM_METRIC_LIMIT vertices."""
+    n = G.number_of_nodes()
+    if n > SPECTRUM_METRIC_LIMIT:
+        raise ValueError(f"{n} vertices exceeds the spectrum limit of {SPECTRUM_METRIC_LIMIT}")
+    return laplacian_spectrum(G).tolist()
+
+def component_summary(G):
+    """Number and largest size of (weakly) connected components."""
+    if G.is_directed():
+        comps = list(nx.weakly_connected_components(G))
+        strong = nx.number_strongly_connected_components(G)
+    else:
+        comps = list(nx.connected_components(G))
+        strong = None
+    summary = {'count': len(comps), 'largest': max((len(c) for c in comps), default=0)}
+    if strong is not None:
+        summary['strong'] = strong
+    return summary
+
+def bridge_list(G):
+    """Bridges of the underlying simple graph; None for directed graphs."""
+    if G.is_directed():
+        return None
+    return [list(b) for b in nx.bridges(simple_graph(G))]
+
+def chromatic_bounds(G):
+    """Cheap lower/upper bounds on the chromatic number of the simple graph."""
+    simpleG = simple_graph(G)
+    simpleG.remove_edges_from(list(nx.selfloop_edges(simpleG)))
+    if simpleG.number_of_edges() == 0:
+        k = 1 if simpleG.number_of_nodes() else 0
+        return {'lower': k, 'upper': k}
+    lower = 2 if nx.is_bipartite(simpleG) else 3
+    greedy = len(set(nx.coloring.greedy_color(simpleG, strategy='largest_first').values()))
+    degeneracy = max(nx.core_number(simpleG).values())
+    return {'lower': lower, 'upper': min(greedy, degeneracy + 1)}
+
+# Per-graph metrics for batch runs; every value is JSON-serializable.
+METRICS = {
+    'components': component_summary,
+    'bridges': bridge_list,
+    'bipartite': lambda G: nx.is_bipartite(simple_graph(G)),
+    'spectrum': spectrum_values,
+    'chromatic': chromatic_bounds,
+}
+
 def get_graph_info(G):
-    """Compute graph information given a NetworkX graph G."""
+    """Compute graph information given a NetworkX graph G.
+
+    Dense matrices and eigenvectors are left out; they are computed on demand
+    with adjacency_matrix, laplacian_matrix and laplacian_spectrum.
+    """
+    n = G.number_of_nodes()
     info = {
         'is_directed': G.is_directed(),
-        'num_vertices': G.number_of_nodes(),
+        'num_vertices': n,
         'num_edges': G.number_of_edges()
     }
 
     if info['is_directed']:
-        info['degrees'] = {n: {'in': G.in_degree(n), 'out': G.out_degree(n)} for n in G.nodes()}
+        info['in_degrees'] = np.fromiter((d for _, d in G.in_degree()), dtype=np.int64, count=n)
+        info['out_degrees'] = np.fromiter((d for _, d in G.out_degree()), dtype=np.int64, count=n)
+        info['degrees'] = info['in_degrees'] + info['out_degrees']
         info['strongly_connected_components'] = list(nx.strongly_connected_components(G))
         info['components'] = list(nx.weakly_connected_components(G))
     else:
-        info['degrees'] = {n: G.degree(n) for n in G.nodes()}
+        info['degrees'] = np.fromiter((d for _, d in G.degree()), dtype=np.int64, count=n)
         info['components'] = list(nx.connected_components(G))
+    info['degree_histogram'] = np.bincount(info['degrees']) if n else np.zeros(0, dtype=np.int64)
 
-    # Build a simple Graph (undirected) for matrix, bridges, and eigenvalue analysis
-    simpleG = nx.Graph()
-    simpleG.add_nodes_from(G.nodes())
-    simpleG.add_edges_from(G.edges())
+    simpleG = simple_graph(G)
 
     if not info['is_directed']:
         info['bridges'] = list(nx.bridges(simpleG))
 
     info['is_bipartite'] = nx.is_bipartite(simpleG)
 
-    try:
-        info['adjacency_matrix'] = nx.adjacency_matrix(simpleG).todense()
-    except Exception:
-        info['adjacency_matrix'] = np.array([])
-
-    try:
-        info['laplacian_matrix'] = nx.laplacian_matrix(simpleG).todense()
-    except Exception:
-        info['laplacian_matrix'] = np.array([])
-
-    try:
-        ev, evecs = np.linalg.eig(info['laplacian_matrix'])
-        info['eigenvalues'] = ev
-        info['eigenvectors'] = evecs
-    except Exception:
-        info['eigenvalues'] = []
-        info['eigenvectors'] = []
+    if n <= SPECTRUM_PREVIEW_LIMIT:
+        info['eigenvalues'] = laplacian_spectrum(G)
+    else:
+        info['eigenvalues'] = None
 
     if not info['is_directed']:
         try:
@@ -67,20 +136,18 @@ def get_graph_info(G):
     return info
 
 def format_info(info):
-    """Format the graph info dictionary into a readable string."""
+    """Format the summary metrics of the graph info dictionary as a readable string."""
     lines = []
     lines.append(f"Graph Type: {'Directed' if info['is_directed'] else 'Undirected'}")
     lines.append(f"Vertices: {info['num_vertices']}")
     lines.append(f"Edges: {info['num_edges']}")
 
-    lines.append("Degrees:")
+    deg = info['degrees']
+    if len(deg) > 0:
+        lines.append(f"Degree: min={deg.min()}, mean={deg.mean():.2f}, max={deg.max()}")
+
     if info['is_directed']:
-        for n, d in info['degrees'].items():
-            lines.append(f"  Node {n}: in-degree={d['in']}, out-degree={d['out']}")
         lines.append(f"Strongly Connected Components: {len(info['strongly_connected_components'])}")
-    else:
-        for n, d in info['degrees'].items():
-            lines.append(f"  Node {n}: degree={d}")
 
     lines.append(f"Connected Components: {len(info['components'])}")
 
@@ -92,14 +159,10 @@ def format_info(info):
     if info['chromatic_number'] is not None:
         lines.append(f"Chromatic Number (heuristic): {info['chromatic_number']}")
 
-    if info['adjacency_matrix'].size > 0:
-        lines.append(f"Adjacency Matrix Size: {info['adjacency_matrix'].shape}")
-
-    if info['laplacian_matrix'].size > 0:
-        lines.append(f"Laplacian Matrix Size: {info['laplacian_matrix'].shape}")
-
     ev = info['eigenvalues']
-    if len(ev) > 0:
+    if ev is None:
+        lines.append(f"Laplacian Spectrum: not computed above {SPECTRUM_PREVIEW_LIMIT} vertices (export to compute)")
+    elif len(ev) > 0:
         preview = np.round(ev[:min(10, len(ev))], 4).tolist()
         lines.append(f"First Eigenvalues: {preview}")
 
@@ -0,0 +1,90 @@
+import numpy as np
+import graph_analysis as ga
+
+
+class GraphModel:
+    """Index arrays of the scene graph, shared by every SubgraphView.
+
+    Vertex i is vertices[i]; edge k is edges[k] and joins edge_array[k].
+    The scene rebuilds the model only after structural changes.
+    """
+
+    def __init__(self, vertices, edges):
+        self.vertices = list(vertices)
+        self.edges = list(edges)
+        self.index = {v: i for i, v in enumerate(self.vertices)}
+        self.edge_array = np.array([(self.index[e.vertex1], self.index[e.vertex2]) for e in self.edges],
+                                   dtype=np.int64).reshape(-1, 2)
+        self.edge_directed = np.array([getattr(e, 'directed', False) for e in self.edges], dtype=bool)
+        self.directed = bool(self.edge_directed.any())
+        self._indptr = None
+        self._order = None
+
+    def _csr(self):
+        # Edges grouped by tail vertex: edges of tail t are _order[_indptr[t]:_indptr[t + 1]].
+        if self._indptr is None:
+            tails = self.edge_array[:, 0]
+            self._order = np.argsort(tails, kind='stable')
+            counts = np.bincount(tails, minlength=len(self.vertices))
+            self._indptr = np.concatenate([[0], np.cumsum(counts)])
+        return self._indptr, self._order
+
+    def full_view(self):
+        return SubgraphView(self, np.arange(len(self.vertices)), np.arange(len(self.edges)))
+
+    def induced(self, vertex_ids):
+        """View of the subgraph induced by vertex_ids.
+
+        Only the selected vertices' edge slots are visited, so the cost scales
+        with the selection rather than with the whole graph.
+        """
+        vids = np.unique(np.asarray(vertex_ids, dtype=np.int64))
+        if len(vids) == 0:
+            return SubgraphView(self, vids, np.empty(0, dtype=np.int64))
+        indptr, order = self._csr()
+        starts = indptr[vids]
+        counts = indptr[vids + 1] - starts
+        slots = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        candidates = order[slots]
+        heads = self.edge_array[candidates, 1]
+        pos = np.searchsorted(vids, heads).clip(max=len(vids) - 1)
+        inside = vids[pos] == heads
+        return SubgraphView(self, vids, np.sort(candidates[inside]))
+
+
+class SubgraphView:
+    """Induced subgraph as sorted vertex/edge index arrays into a GraphModel.
+
+    Local vertex i is model vertex vertex_ids[i]; nothing of the model is copied.
+    """
+
+    def __init__(self, model, vertex_ids, edge_ids):
+        self.model = model
+        self.vertex_ids = vertex_ids
+        self.edge_ids = edge_ids
+
+    def __len__(self):
+        return len(self.vertex_ids)
+
+    @property
+    def directed(self):
+        """Whether any edge of this view (not of the whole scene) is directed."""
+        return bool(self.model.edge_directed[self.edge_ids].any())
+
+    def local(self, vertex_id):
+        """Local index of a model vertex index."""
+        return int(np.searchsorted(self.vertex_ids, vertex_id))
+
+    def local_edges(self):
+        """(k, 2) edge endpoints relabelled to local vertex indices."""
+        return np.searchsorted(self.vertex_ids, self.model.edge_array[self.edge_ids])
+
+    def vertex_items(self):
+        return [self.model.vertices[i] for i in self.vertex_ids.tolist()]
+
+    def edge_items(self):
+        return [self.model.edges[k] for k in self.edge_ids.tolist()]
+
+    def to_networkx(self):
+        """NetworkX multigraph on local indices 0..len(self)-1."""
+        return ga.graph_from_edges(len(self), self.local_edges().tolist(), self.directed)
@@ -0,0 +1,153 @@
+import numpy as np
+
+# A graph here is a vertex count n plus an (m, 2) integer array of edges.
+# Product vertex (u, v) of G x H gets index u * n_h + v, so every product is
+# plain index arithmetic on the factor edge arrays.
+
+PRODUCTS = ('cartesian', 'tensor', 'strong', 'lexicographic')
+
+
+def edge_array(edges):
+    """Coerce an edge list into an (m, 2) int64 array."""
+    return np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+
+
+def simplify(n, edges, directed=False):
+    """Drop duplicate edges (and reversed duplicates when undirected)."""
+    edges = edge_array(edges)
+    if not directed:
+        edges = np.sort(edges, axis=1)
+    keys = np.unique(edges[:, 0] * max(n, 1) + edges[:, 1])
+    return np.column_stack([keys // max(n, 1), keys % max(n, 1)])
+
+
+def _copies_of_h(n_g, e_h, n_h):
+    # One copy of H inside every G-vertex: (u, a)-(u, b) for ab in E(H).
+    base = np.arange(n_g, dtype=np.int64)[:, None, None] * n_h
+    return (base + e_h[None, :, :]).reshape(-1, 2)
+
+
+def _copies_of_g(e_g, n_h):
+    # One copy of G per H-vertex: (a, v)-(b, v) for ab in E(G).
+    layer = np.arange(n_h, dtype=np.int64)[None, :, None]
+    return (e_g[:, None, :] * n_h + layer).reshape(-1, 2)
+
+
+def _tensor_edges(e_g, e_h, n_h, directed):
+    src = e_g[:, 0, None] * n_h
+    dst = e_g[:, 1, None] * n_h
+    fwd = np.stack([src + e_h[None, :, 0], dst + e_h[None, :, 1]], axis=-1)
+    if directed:
+        return fwd.reshape(-1, 2)
+    rev = np.stack([src + e_h[None, :, 1], dst + e_h[None, :, 0]], axis=-1)
+    return np.concatenate([fwd.reshape(-1, 2), rev.reshape(-1, 2)])
+
+
+def _lexicographic_edges(e_g, n_h):
+    # Every G-edge ab joins all of copy a to all of copy b.
+    vh = np.arange(n_h, dtype=np.int64)
+    src = e_g[:, 0, None, None] * n_h + vh[None, :, None]
+    dst = e_g[:, 1, None, None] * n_h + vh[None, None, :]
+    src, dst = np.broadcast_arrays(src, dst)
+    return np.stack([src, dst], axis=-1).reshape(-1, 2)
+
+
+def product(kind, n_g, e_g, n_h, e_h, directed=False):
+    """Return (n, edges) of the product of G and H of the given kind."""
+    if kind not in PRODUCTS:
+        raise ValueError(f"Unknown graph product: {kind}")
+    e_g = simplify(n_g, e_g, directed)
+    e_h = simplify(n_h, e_h, directed)
+    n = n_g * n_h
+
+    parts = []
+    if kind in ('cartesian', 'strong'):
+        parts += [_copies_of_g(e_g, n_h), _copies_of_h(n_g, e_h, n_h)]
+    if kind in ('tensor', 'strong'):
+        parts.append(_tensor_edges(e_g, e_h, n_h, directed))
+    if kind == 'lexicographic':
+        parts += [_lexicographic_edges(e_g, n_h), _copies_of_h(n_g, e_h, n_h)]
+
+    return n, simplify(n, np.concatenate(parts), directed)
+
+
+def product_size(kind, n_g, m_g, n_h, m_h, directed=False):
+    """Vertex count and an upper bound on the edge count of a product.
+
+    m_g and m_h are edge counts of the simplified factors; the bound is the
+    number of edges product() generates before removing duplicates.
+    """
+    cartesian = m_g * n_h + n_g * m_h
+    tensor = m_g * m_h * (1 if directed else 2)
+    edges = {
+        'cartesian': cartesian,
+        'tensor': tensor,
+        'strong': cartesian + tensor,
+        'lexicographic': m_g * n_h * n_h + n_g * m_h,
+    }[kind]
+    return n_g * n_h, edges
+
+
+def power_size(kind, n_g, e_g, n_h, e_h, power, directed=False):
+    """product_size of G x H x ... x H (power factors of H), from edge arrays."""
+    n, m = n_g, len(simplify(n_g, e_g, directed))
+    m_h = len(simplify(n_h, e_h, directed))
+    for _ in range(power):
+        n, m = product_size(kind, n, m, n_h, m_h, directed)
+    return n, m
+
+
+def grid_layout(n, spacing=100.0):
+    """Place n vertices on a roughly square grid."""
+    cols = max(1, int(np.ceil(np.sqrt(n))))
+    idx = np.arange(n)
+    return np.column_stack([idx % cols, idx // cols]).astype(float) * spacing
+
+
+def product_layout(pos_g, n_h, gap=100.0):
+    """Lay out G x H as one copy of G's drawing per H-vertex.
+
+    The copies sit on a grid whose column count keeps the overall drawing
+    close to square, so repeated powers alternate between growing
+    horizontally and vertically.
+    """
+    pos_g = np.asarray(pos_g, dtype=float).reshape(-1, 2)
+    if len(pos_g) == 0 or n_h == 0:
+        return np.empty((0, 2))
+    lo = pos_g.min(axis=0)
+    cell = pos_g.max(axis=0) - lo + gap
+    cols = int(np.clip(np.ceil(np.sqrt(n_h * cell[1] / cell[0])), 1, n_h))
+    h = np.arange(n_h)
+    offsets = np.column_stack([h % cols, h // cols]) * cell
+    return (pos_g[:, None, :] + offsets[None, :, :]).reshape(-1, 2)
+
+
+def complete_graph(n):
+    i, j = np.triu_indices(n, k=1)
+    return n, np.column_stack([i, j]).astype(np.int64)
+
+
+def path_graph(n):
+    idx = np.arange(max(n - 1, 0), dtype=np.int64)
+    return n, np.column_stack([idx, idx + 1])
+
+
+def cycle_graph(n):
+    if n < 3:
+        return path_graph(n)
+    idx = np.arange(n, dtype=np.int64)
+    return n, np.column_stack([idx, (idx + 1) % n])
+
+
+def star_graph(n):
+    """Star with one center and n leaves."""
+    leaves = np.arange(1, n + 1, dtype=np.int64)
+    return n + 1, np.column_stack([np.zeros_like(leaves), leaves])
+
+
+GENERATORS = {
+    'Complete K_n': complete_graph,
+    'Path P_n': path_graph,
+    'Cycle C_n': cycle_graph,
+    'Star S_n': star_graph,
+}
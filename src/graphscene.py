@@ -1,12 +1,38 @@
 from PyQt5.QtGui import QColor
-from PyQt5.QtWidgets import QGraphicsScene, QColorDialog, QMessageBox, QInputDialog
+from PyQt5.QtWidgets import (
+    QGraphicsScene, QColorDialog, QMessageBox, QInputDialog, QUndoStack
+)
 from PyQt5.QtCore import Qt, QPointF
 from vertex import Vertex
 from edge import Edge
+from graph_model import GraphModel
+from commands import AddItemsCommand, RemoveItemsCommand, MoveVerticesCommand, ColorCommand
+from contextlib import contextmanager
 import math
 import networkx as nx
 import graph_analysis as ga
 import itertools
+import numpy as np
+import graph_products as gp
+
+BULK_THRESHOLD = 1000
+MOVE_EPSILON = 0.05
+MIN_LAYOUT_HALF_SIZE = 50.0  # smallest half-extent of a selection layout
+DRIFT_LOG_DISTANCE = 20.0  # physics drift journaled once a vertex strays this far
+
+def _merge_at(items, slots):
+    """Rebuild items with each (index, item) slot put back at its index."""
+    merged = []
+    rest = iter(items)
+    for idx, item in slots:
+        while len(merged) < idx:
+            merged.append(next(rest))
+        merged.append(item)
+    merged.extend(rest)
+    return merged
+
+def _color_name(color):
+    return color.name() if color is not None else None
 
 class GraphScene(QGraphicsScene):
     def __init__(self, parent=None):
@@ -15,19 +41,174 @@ class GraphScene(QGraphicsScene):
         self.edges = []
         self.edge_source = None
         self.directed_mode = False
+        self.undo_stack = QUndoStack(self)
+        self._drag_start = {}
+        self.journal = None  # autosave sink for structural change events
+        self.selection_only = False  # scope analyses to the selected subgraph
+        self._model = None
+        self._uids = itertools.count()
 
     def add_vertex(self, x, y):
         v = Vertex(x, y)
-        self.addItem(v)
-        self.vertices.append(v)
+        self.undo_stack.push(AddItemsCommand(self, [v], [], "Add Vertex"))
         return v
 
-    def add_edge(self, v1, v2):
-        e = Edge(v1, v2, directed=self.directed_mode)
-        self.addItem(e)
-        self.edges.append(e)
+    def add_edge(self, v1, v2, directed=None):
+        if directed is None:
+            directed = self.directed_mode
+        e = Edge(v1, v2, directed=directed)
+        self.undo_stack.push(AddItemsCommand(self, [], [e], "Add Edge"))
         return e
 
+    def delete_items(self, items, text="Delete"):
+        """Delete the given vertices (with their incident edges) and edges."""
+        vertices = [i for i in items if isinstance(i, Vertex)]
+        doomed = set(vertices)
+        marked = {i for i in items if isinstance(i, Edge)}
+        edges = [e for e in self.edges
+                 if e in marked or e.vertex1 in doomed or e.vertex2 in doomed]
+        if vertices or edges:
+            self.undo_stack.push(RemoveItemsCommand(self, vertices, edges, text))
+
+    def set_item_color(self, item, color):
+        self.undo_stack.push(ColorCommand(self, item, color))
+
+    def record_moves(self, old_positions, text="Move", extendable=False):
+        """Record vertex moves away from old_positions as one undo entry."""
+        moves = self._moves_since(old_positions)
+        if moves:
+            self._log_moves(moves)
+            self.undo_stack.push(MoveVerticesCommand(self, moves, text, extendable))
+
+    def _moves_since(self, old_positions):
+        moves = {}
+        for v, old in old_positions.items():
+            new = v.pos()
+            if v.scene() is self and (new - old).manhattanLength() > MOVE_EPSILON:
+                moves[v] = [old, new]
+        return moves
+
+    def _extend_drag(self, moves):
+        # Physics settling after a drag belongs to that drag; otherwise it is
+        # kept out of the history.
+        stack = self.undo_stack
+        if stack.index() != stack.count() or stack.index() == 0:
+            return
+        top = stack.command(stack.index() - 1)
+        if isinstance(top, MoveVerticesCommand) and top.extendable:
+            top.extend(moves)
+
+    def state(self):
+        """Full scene state in the autosave snapshot format."""
+        vertices = []
+        for v in self.vertices:
+            v.logged_pos = v.pos()
+            c = v.pos() + v.get_center()
+            vertices.append([v.uid, c.x(), c.y(), _color_name(v.user_color())])
+        edges = [[e.uid, e.vertex1.uid, e.vertex2.uid, e.directed, _color_name(e.user_color())]
+                 for e in self.edges]
+        return {'vertices': vertices, 'edges': edges}
+
+    def load_state(self, state):
+        """Replace the scene with a saved state, outside of the undo history."""
+        self._detach(self.vertices, self.edges)
+        self.undo_stack.clear()
+        by_uid = {}
+        for uid, x, y, color in state['vertices']:
+            v = Vertex(x, y)
+            v.uid = uid
+            if color:
+                v.set_color(QColor(color))
+            by_uid[uid] = v
+        edges = []
+        for uid, a, b, directed, color in state['edges']:
+            e = Edge(by_uid[a], by_uid[b], directed=directed)
+            e.uid = uid
+            if color:
+                e.set_color(QColor(color))
+            edges.append(e)
+        uids = list(by_uid) + [e.uid for e in edges]
+        self._uids = itertools.count(max(uids) + 1 if uids else 0)
+        self._attach(list(by_uid.values()), edges)
+
+    def _log_added(self, vertices, edges):
+        for v in vertices:
+            v.logged_pos = v.pos()
+            c = v.pos() + v.get_center()
+            self.journal.append('add_vertex', v.uid, c.x(), c.y(), _color_name(v.user_color()))
+        for e in edges:
+            self.journal.append('add_edge', e.uid, e.vertex1.uid, e.vertex2.uid,
+                                e.directed, _color_name(e.user_color()))
+
+    def _log_moves(self, moves):
+        if self.journal is None:
+            return
+        for v in moves:
+            v.logged_pos = v.pos()
+            c = v.pos() + v.get_center()
+            self.journal.append('move', v.uid, c.x(), c.y())
+
+    def _set_color(self, item, color):
+        item.set_color(color)
+        if self.journal is not None:
+            self.journal.append('color', item.uid, _color_name(color))
+
+    @contextmanager
+    def _bulk(self, count):
+        # Large batches are much cheaper without the BSP index being updated per item.
+        if count < BULK_THRESHOLD:
+            yield
+            return
+        self.setItemIndexMethod(QGraphicsScene.NoIndex)
+        try:
+            yield
+        finally:
+            self.setItemIndexMethod(QGraphicsScene.BspTreeIndex)
+
+    def _attach(self, vertices, edges):
+        """Add items to the scene and append them to the vertex/edge lists."""
+        with self._bulk(len(vertices) + len(edges)):
+            for item in itertools.chain(vertices, edges):
+                if item.uid is None:
+                    item.uid = next(self._uids)
+                self.addItem(item)
+        self.vertices.extend(vertices)
+        self.edges.extend(edges)
+        self._model = None
+        if self.journal is not None:
+            self._log_added(vertices, edges)
+
+    def _detach(self, vertices, edges):
+        """Remove items from the scene; returns (index, item) slots for _restore."""
+        gone_v, gone_e = set(vertices), set(edges)
+        vertex_slots = [(i, v) for i, v in enumerate(self.vertices) if v in gone_v]
+        edge_slots = [(i, e) for i, e in enumerate(self.edges) if e in gone_e]
+        self.vertices = [v for v in self.vertices if v not in gone_v]
+        self.edges = [e for e in self.edges if e not in gone_e]
+        self._model = None
+        with self._bulk(len(vertices) + len(edges)):
+            for item in itertools.chain(edges, vertices):
+                self.removeItem(item)
+        if self.edge_source in gone_v:
+            self.edge_source = None
+        if self.journal is not None:
+            for e in edges:
+                self.journal.append('remove_edge', e.uid)
+            for v in vertices:
+                self.journal.append('remove_vertex', v.uid)
+        return vertex_slots, edge_slots
+
+    def _restore(self, vertex_slots, edge_slots):
+        """Undo a _detach, putting items back at their former list indices."""
+        with self._bulk(len(vertex_slots) + len(edge_slots)):
+            for _, item in itertools.chain(vertex_slots, edge_slots):
+                self.addItem(item)
+        self.vertices = _merge_at(self.vertices, vertex_slots)
+        self.edges = _merge_at(self.edges, edge_slots)
+        self._model = None
+        if self.journal is not None:
+            self._log_added([v for _, v in vertex_slots], [e for _, e in edge_slots])
+
     def mousePressEvent(self, event):
         items = self.items(event.scenePos())
         v_click = next((i for i in items if isinstance(i, Vertex)), None)
@@ -43,6 +224,9 @@ class GraphScene(QGraphicsScene):
                     self.edge_source = None
             elif e_click:
                 e_click.setSelected(True)
+            elif event.modifiers() & Qt.ShiftModifier:
+                # Shift+drag on empty space rubber-band selects instead.
+                self.edge_source = None
             else:
                 self.edge_source = None
                 self.add_vertex(event.scenePos().x(), event.scenePos().y())
@@ -51,37 +235,27 @@ class GraphScene(QGraphicsScene):
             if v_click or e_click:
                 color = QColorDialog.getColor()
                 if color.isValid():
-                    if v_click:
-                        v_click.set_color(color)
-                    elif e_click:
-                        e_click.set_color(color)
+                    self.set_item_color(v_click or e_click, color)
 
         super().mousePressEvent(event)
+        if event.button() == Qt.LeftButton:
+            self._drag_start = {v: v.pos() for v in self.selectedItems() if isinstance(v, Vertex)}
+
+    def mouseReleaseEvent(self, event):
+        super().mouseReleaseEvent(event)
+        if self._drag_start:
+            self.record_moves(self._drag_start, "Drag", extendable=True)
+            self._drag_start = {}
 
     def keyPressEvent(self, event):
         if event.key() == Qt.Key_Delete:
-            for item in list(self.selectedItems()):
-                if isinstance(item, Vertex):
-                    for e in list(self.edges):
-                        if e.vertex1 == item or e.vertex2 == item:
-                            self.removeItem(e)
-                            self.edges.remove(e)
-                    self.removeItem(item)
-                    self.vertices.remove(item)
-                elif isinstance(item, Edge):
-                    self.removeItem(item)
-                    self.edges.remove(item)
+            self.delete_items(self.selectedItems())
             self.edge_source = None
         else:
             super().keyPressEvent(event)
 
     def clear_scene(self):
-        for e in self.edges:
-            self.removeItem(e)
-        for v in self.vertices:
-            self.removeItem(v)
-        self.vertices.clear()
-        self.edges.clear()
+        self.delete_items(self.vertices + self.edges, "Clear Scene")
         self.edge_source = None
 
     def update_edges(self):
@@ -90,6 +264,7 @@ class GraphScene(QGraphicsScene):
 
     def update_physics(self, dt):
         rest, kr, ka, damp = 100.0, 10000.0, 0.5, 0.9
+        old_positions = {v: v.pos() for v in self.vertices}
         for v in self.vertices:
             v.force = QPointF(0, 0)
 
@@ -120,10 +295,72 @@ class GraphScene(QGraphicsScene):
             v.velocity = (v.velocity + v.force * dt) * damp
             v.setPos(v.pos() + v.velocity * dt)
 
+        moves = self._moves_since(old_positions)
+        if moves:
+            self._extend_drag(moves)
+            self._log_drift(moves)
+
+    def _log_drift(self, moves):
+        # Journal physics motion only once a vertex has strayed from its last
+        # logged position, so a slowly drifting graph costs a few events
+        # rather than one per vertex per tick.
+        if self.journal is None:
+            return
+        drifted = [v for v in moves
+                   if v.logged_pos is None
+                   or (v.pos() - v.logged_pos).manhattanLength() > DRIFT_LOG_DISTANCE]
+        if drifted:
+            self._log_moves(drifted)
+
+    def model(self):
+        """Index-array model of the scene, rebuilt only after structural changes."""
+        if self._model is None:
+            self._model = GraphModel(self.vertices, self.edges)
+        return self._model
+
+    def analysis_view(self):
+        """Subgraph that analyses run on: the selection in selection mode, else everything.
+
+        Returns None (after warning) in selection mode when nothing is selected.
+        """
+        model = self.model()
+        if not self.selection_only:
+            return model.full_view()
+        ids = set()
+        for item in self.selectedItems():
+            if isinstance(item, Vertex):
+                ids.add(model.index[item])
+            elif isinstance(item, Edge):
+                ids.update((model.index[item.vertex1], model.index[item.vertex2]))
+        if not ids:
+            QMessageBox.warning(None, "Error", "Select vertices or edges to analyze.")
+            return None
+        return model.induced(list(ids))
+
+    def _pick_vertices(self, view, first, second):
+        """Ask for two vertices of the view by scene index; returns local indices or None."""
+        if len(view) < 2:
+            QMessageBox.warning(None, "Error", "Need at least 2 vertices.")
+            return None
+        ids = [str(i) for i in view.vertex_ids.tolist()]
+        i, ok1 = QInputDialog.getItem(None, f"{first} Vertex", f"Select {first.lower()} vertex:", ids, 0, False)
+        if not ok1:
+            return None
+        j, ok2 = QInputDialog.getItem(None, f"{second} Vertex", f"Select {second.lower()} vertex:", ids, 0, False)
+        if not ok2:
+            return None
+        return view.local(int(i)), view.local(int(j))
+
     def label_degrees(self):
+        view = self.analysis_view()
+        if view is None:
+            return
         self.clear_labels()
-        for v in self.vertices:
-            deg = sum(1 for e in self.edges if e.vertex1 is v or e.vertex2 is v)
+        ends = view.local_edges()
+        # A self-loop adds one to its vertex's degree, as it always has here.
+        ends = np.concatenate([ends[:, 0], ends[ends[:, 0] != ends[:, 1], 1]])
+        degrees = np.bincount(ends, minlength=len(view))
+        for v, deg in zip(view.vertex_items(), degrees.tolist()):
             v.set_label(str(deg))
             if v.label_item:
                 v.label_item.setDefaultTextColor(QColor('white'))
@@ -135,14 +372,16 @@ class GraphScene(QGraphicsScene):
                 v.label_item = None
 
     def highlight_bridges(self):
+        view = self.analysis_view()
+        if view is None:
+            return
         try:
-            G = ga.build_graph(self)
-            simpleG = nx.Graph(G)
+            simpleG = ga.simple_graph(view.to_networkx())
             bridges = {tuple(sorted(b)) for b in nx.bridges(simpleG)}
-            for e in self.edges:
-                key = tuple(sorted((id(e.vertex1), id(e.vertex2))))
-                if key in bridges:
-                    e.set_temp_color(QColor('red'))
+            red = QColor('red')
+            for e, (a, b) in zip(view.edge_items(), view.local_edges().tolist()):
+                if tuple(sorted((a, b))) in bridges:
+                    e.set_temp_color(red)
                 else:
                     e.reset_temp_color()
         except Exception as e:
@@ -153,92 +392,75 @@ class GraphScene(QGraphicsScene):
             e.reset_temp_color()
 
     def color_by_component(self):
-        adj = {v: [] for v in self.vertices}
-        for e in self.edges:
-            adj[e.vertex1].append(e.vertex2)
-            adj[e.vertex2].append(e.vertex1)
+        view = self.analysis_view()
+        if view is None:
+            return
+        vertices = view.vertex_items()
+        components = nx.connected_components(ga.simple_graph(view.to_networkx()))
 
-        visited = set()
-        components = []
-        for v in self.vertices:
-            if v not in visited:
-                queue = [v]
-                visited.add(v)
-                comp = []
-                while queue:
-                    u = queue.pop(0)
-                    comp.append(u)
-                    for nbr in adj[u]:
-                        if nbr not in visited:
-                            visited.add(nbr)
-                            queue.append(nbr)
-                components.append(comp)
-
-        palette = ['#e6194b', '#3cb44b', '#ffe119', '#4363d8', '#f58231', '#911eb4']
+        palette = [QColor(c) for c in ('#e6194b', '#3cb44b', '#ffe119', '#4363d8', '#f58231', '#911eb4')]
         for idx, comp in enumerate(components):
-            color = QColor(palette[idx % len(palette)])
-            for v in comp:
-                v.set_temp_color(color)
+            color = palette[idx % len(palette)]
+            for i in comp:
+                vertices[i].set_temp_color(color)
 
     def reset_vertex_colors(self):
         for v in self.vertices:
             v.reset_temp_color()
 
     def color_by_bipartite(self):
-        adj = {v: [] for v in self.vertices}
-        for e in self.edges:
-            adj[e.vertex1].append(e.vertex2)
-            adj[e.vertex2].append(e.vertex1)
-
-        color = {}
-        for start in self.vertices:
-            if start in color:
-                continue
-            queue = [start]
-            color[start] = 0
-            while queue:
-                u = queue.pop(0)
-                for nbr in adj[u]:
-                    if nbr not in color:
-                        color[nbr] = 1 - color[u]
-                        queue.append(nbr)
-                    elif color[nbr] == color[u]:
-                        return False
-        for v, side in color.items():
-            v.set_temp_color(QColor('#aaffc3') if side == 0 else QColor('#ffd8b1'))
+        view = self.analysis_view()
+        if view is None:
+            return None
+        vertices = view.vertex_items()
+        try:
+            color = nx.bipartite.color(ga.simple_graph(view.to_networkx()))
+        except nx.NetworkXError:
+            return False
+        sides = (QColor('#aaffc3'), QColor('#ffd8b1'))
+        for i, side in color.items():
+            vertices[i].set_temp_color(sides[side])
         return True
 
     def pretty_layout(self):
-        G = ga.build_graph(self)
-        pos = nx.spring_layout(G)
-        id_to_vertex = {id(v): v for v in self.vertices}
-        for node_id, (x, y) in pos.items():
-            if node_id in id_to_vertex:
-                id_to_vertex[node_id].setPos(x * 500, y * 500)
+        view = self.analysis_view()
+        if view is None:
+            return
+        vertices = view.vertex_items()
+        pos = nx.spring_layout(view.to_networkx())
+        old_positions = {v: v.pos() for v in vertices}
+        # Layout targets are vertex centers in scene coordinates; pos() is
+        # only an offset from where a vertex was created.
+        mid, half = np.zeros(2), np.full(2, 500.0)
+        if self.selection_only:
+            # Lay the selection out over the region it already occupies.
+            centers = np.array([(c.x(), c.y()) for c in (v.pos() + v.get_center() for v in vertices)])
+            lo, hi = centers.min(axis=0), centers.max(axis=0)
+            mid, half = (lo + hi) / 2, np.maximum((hi - lo) / 2, MIN_LAYOUT_HALF_SIZE)
+        for i, p in pos.items():
+            x, y = mid + np.asarray(p) * half
+            vertices[i].setPos(QPointF(x, y) - vertices[i].get_center())
+        self.record_moves(old_positions, "Pretty Layout")
 
     def run_dijkstra(self):
-        if len(self.vertices) < 2:
-            QMessageBox.warning(None, "Error", "Need at least 2 vertices.")
-            return
-        ids = [str(i) for i in range(len(self.vertices))]
-        i, ok1 = QInputDialog.getItem(None, "Source Vertex", "Select source vertex:", ids, 0, False)
-        if not ok1:
+        view = self.analysis_view()
+        if view is None:
             return
-        j, ok2 = QInputDialog.getItem(None, "Target Vertex", "Select target vertex:", ids, 0, False)
-        if not ok2:
+        picked = self._pick_vertices(view, "Source", "Target")
+        if picked is None:
             return
-        source = self.vertices[int(i)]
-        target = self.vertices[int(j)]
-
-        G = ga.build_graph(self)
+        G = view.to_networkx()
         try:
-            length = nx.shortest_path_length(G, id(source), id(target))
+            length = nx.shortest_path_length(G, *picked)
             QMessageBox.information(None, "Dijkstra Result", f"Shortest path length: {length}")
         except:
             QMessageBox.warning(None, "Error", "No path exists between the selected vertices.")
 
     def find_mst(self):
-        G = ga.build_graph(self)
+        view = self.analysis_view()
+        if view is None:
+            return
+        G = view.to_networkx()
         simpleG = nx.Graph(G)
         try:
             T = nx.minimum_spanning_tree(simpleG)
@@ -248,37 +470,32 @@ class GraphScene(QGraphicsScene):
             QMessageBox.warning(None, "Error", "Cannot compute MST for disconnected graph.")
 
     def find_max_flow(self):
-        if len(self.vertices) < 2:
-            QMessageBox.warning(None, "Error", "Need at least 2 vertices.")
+        view = self.analysis_view()
+        if view is None:
             return
-        ids = [str(i) for i in range(len(self.vertices))]
-        i, ok1 = QInputDialog.getItem(None, "Source Vertex", "Select source vertex:", ids, 0, False)
-        if not ok1:
+        picked = self._pick_vertices(view, "Source", "Sink")
+        if picked is None:
             return
-        j, ok2 = QInputDialog.getItem(None, "Sink Vertex", "Select sink vertex:", ids, 0, False)
-        if not ok2:
-            return
-        source = self.vertices[int(i)]
-        sink = self.vertices[int(j)]
 
         G = nx.DiGraph()
-        for e in self.edges:
-            u = id(e.vertex1)
-            v = id(e.vertex2)
-            G.add_edge(u, v, capacity=1)
+        G.add_nodes_from(range(len(view)))
+        G.add_edges_from(view.local_edges().tolist(), capacity=1)
 
         try:
-            flow_value, _ = nx.maximum_flow(G, id(source), id(sink))
+            flow_value, _ = nx.maximum_flow(G, *picked)
             QMessageBox.information(None, "Max Flow Result", f"Maximum flow value: {flow_value}")
         except Exception as e:
             QMessageBox.warning(None, "Error", f"Cannot compute max flow.\n{str(e)}")
 
     def chromatic_polynomial(self):
-        nodes = [id(v) for v in self.vertices]
+        view = self.analysis_view()
+        if view is None:
+            return
+        nodes = list(range(len(view)))
         adj = {u: set() for u in nodes}
-        for e in self.edges:
-            adj[id(e.vertex1)].add(id(e.vertex2))
-            adj[id(e.vertex2)].add(id(e.vertex1))
+        for a, b in view.local_edges().tolist():
+            adj[a].add(b)
+            adj[b].add(a)
         n = len(nodes)
         poly = {}
         for k in range(1, min(n, 6) + 1):
@@ -297,28 +514,21 @@ class GraphScene(QGraphicsScene):
             poly[k] = count
         return poly
 
-    def cartesian_product(self):
-        G = ga.build_graph(self)
-        H = nx.complete_graph(2)
-        P = nx.cartesian_product(G, H)
-
-        id_to_pos = {id(v): v.pos() for v in self.vertices}
-
-        for e in list(self.edges):
-            self.removeItem(e)
-            self.edges.remove(e)
-        for v in list(self.vertices):
-            self.removeItem(v)
-            self.vertices.remove(v)
-
-        self.edge_source = None
-        self.vertex_map = {}
-
-        dx = 200
-        for (u, i) in P.nodes():
-            pos = id_to_pos.get(u, QPointF(0, 0)) + QPointF(i * dx, 0)
-            nv = self.add_vertex(pos.x(), pos.y())
-            self.vertex_map[(u, i)] = nv
-
-        for u1, u2 in P.edges():
-            self.add_edge(self.vertex_map[u1], self.vertex_map[u2])
+    def load_graph(self, positions, edges, directed=False, text="Load Graph"):
+        """Replace the scene with vertices at positions joined by index edges."""
+        vertices = [Vertex(x, y) for x, y in np.asarray(positions).tolist()]
+        edges = [Edge(vertices[a], vertices[b], directed=directed)
+                 for a, b in np.asarray(edges).tolist()]
+        self.undo_stack.beginMacro(text)
+        self.clear_scene()
+        self.undo_stack.push(AddItemsCommand(self, vertices, edges, text))
+        self.undo_stack.endMacro()
+
+    def graph_product(self, kind, n_h, edges_h, power=1):
+        """Replace the graph G with G x H x ... x H (power factors of H)."""
+        pos, edges, directed = ga.scene_arrays(self)
+        n = len(pos)
+        for _ in range(power):
+            pos = gp.product_layout(pos, n_h)
+            n, edges = gp.product(kind, n, edges, n_h, edges_h, directed)
+        self.load_graph(pos, edges, directed, "Graph Product")
@@ -0,0 +1,230 @@
+import json
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+AUTOSAVE_DIR = os.path.join(os.path.expanduser('~'), '.graphcraft', 'autosave')
+JOURNAL_NAME = 'journal.jsonl'
+SNAPSHOT_NAME = 'snapshot.json'
+LOCK_NAME = 'lock'
+FLUSH_INTERVAL = 0.5     # seconds the writer waits to batch events
+COMPACT_EVENTS = 20000   # journal length that triggers a new snapshot
+
+# Journal lines are JSON arrays [seq, op, *args] with ops:
+#   add_vertex uid x y color | add_edge uid v1 v2 directed color
+#   remove_vertex uid | remove_edge uid | move uid x y | color uid color
+# A snapshot stores the full state plus the seq of the last event it covers,
+# so replay skips anything older even if compaction was interrupted.
+#
+# Every running window journals into its own session directory under
+# AUTOSAVE_DIR and holds an OS lock on the lock file inside it. The OS drops
+# the lock when the process dies, so a session whose lock can be taken is
+# one whose owner crashed.
+
+
+class Journal:
+    """Append-only change log of a scene, written on a background thread."""
+
+    def __init__(self, state, directory=None):
+        if directory is None:
+            os.makedirs(AUTOSAVE_DIR, exist_ok=True)
+            directory = tempfile.mkdtemp(prefix='session-', dir=AUTOSAVE_DIR)
+        self._lock = claim(directory)
+        if self._lock is None:
+            raise OSError(f"Autosave directory is in use: {directory}")
+        self.directory = directory
+        self.journal_path = os.path.join(directory, JOURNAL_NAME)
+        self.snapshot_path = os.path.join(directory, SNAPSHOT_NAME)
+        self.events_since_snapshot = 0
+        self._seq = 0
+        self._queue = queue.Queue()
+        self.snapshot(state)
+        self._thread = threading.Thread(target=self._run, name='autosave', daemon=True)
+        self._thread.start()
+
+    def append(self, *event):
+        self.events_since_snapshot += 1
+        self._queue.put(event)
+
+    def snapshot(self, state):
+        """Queue a compaction: the journal restarts from this state."""
+        self.events_since_snapshot = 0
+        self._queue.put(_Snapshot(state))
+
+    def close(self, discard=True):
+        """Flush pending events and stop the writer; discard removes the files."""
+        self._queue.put(None)
+        self._thread.join()
+        if discard:
+            discard_autosave(self.directory, self._lock)
+        else:
+            self._lock.close()
+
+    def _run(self):
+        out = open(self.journal_path, 'a', encoding='utf-8')
+        try:
+            running = True
+            while running:
+                batch = self._collect()
+                running = batch[-1] is not None
+                events = []
+                for item in batch:
+                    if isinstance(item, _Snapshot):
+                        self._write_events(out, events)
+                        events = []
+                        out = self._write_snapshot(out, item.state)
+                    elif item is not None:
+                        events.append(item)
+                self._write_events(out, events)
+        finally:
+            out.close()
+
+    def _collect(self):
+        # Block for the first item, then gather whatever arrives shortly after.
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + FLUSH_INTERVAL
+        while batch[-1] is not None:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write_events(self, out, events):
+        if not events:
+            return
+        lines = []
+        for event in _coalesce_moves(events):
+            self._seq += 1
+            lines.append(json.dumps([self._seq, *event]))
+        out.write('\n'.join(lines) + '\n')
+        out.flush()
+        os.fsync(out.fileno())
+
+    def _write_snapshot(self, out, state):
+        tmp = self.snapshot_path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(dict(state, seq=self._seq), f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_path)
+        out.close()
+        return open(self.journal_path, 'w', encoding='utf-8')
+
+
+class _Snapshot:
+    def __init__(self, state):
+        self.state = state
+
+
+def _coalesce_moves(events):
+    """Keep only the last move of each vertex; later moves overwrite earlier ones."""
+    seen = set()
+    kept = []
+    for event in reversed(events):
+        if event[0] == 'move':
+            if event[1] in seen:
+                continue
+            seen.add(event[1])
+        kept.append(event)
+    kept.reverse()
+    return kept
+
+
+def claim(directory):
+    """Lock a session directory; returns the open lock file, or None if it is taken."""
+    os.makedirs(directory, exist_ok=True)
+    f = open(os.path.join(directory, LOCK_NAME), 'a+')
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        f.close()
+        return None
+    return f
+
+
+def orphaned_sessions(root=AUTOSAVE_DIR):
+    """(directory, lock) of crashed sessions, newest first, each locked by the caller."""
+    try:
+        names = os.listdir(root)
+    except OSError:
+        return []
+    sessions = []
+    for name in names:
+        directory = os.path.join(root, name)
+        if not name.startswith('session-') or not os.path.isdir(directory):
+            continue
+        lock = claim(directory)
+        if lock is not None:
+            sessions.append((os.path.getmtime(directory), directory, lock))
+    sessions.sort(reverse=True)
+    return [(directory, lock) for _, directory, lock in sessions]
+
+
+def discard_autosave(directory, lock):
+    """Remove a session directory whose lock the caller holds."""
+    lock.close()
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+def recover(directory):
+    """Rebuild the last autosaved state by replaying snapshot plus journal."""
+    vertices, edges, seq = {}, {}, 0
+    snapshot_path = os.path.join(directory, SNAPSHOT_NAME)
+    if os.path.exists(snapshot_path):
+        with open(snapshot_path, 'r', encoding='utf-8') as f:
+            snap = json.load(f)
+        seq = snap.get('seq', 0)
+        vertices = {v[0]: v[1:] for v in snap.get('vertices', [])}
+        edges = {e[0]: e[1:] for e in snap.get('edges', [])}
+
+    journal_path = os.path.join(directory, JOURNAL_NAME)
+    if os.path.exists(journal_path):
+        with open(journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    break  # torn final write
+                if event[0] > seq:
+                    _replay(vertices, edges, event[1], event[2:])
+
+    return {
+        'vertices': [[uid, *v] for uid, v in vertices.items()],
+        'edges': [[uid, *e] for uid, e in edges.items()
+                  if e[0] in vertices and e[1] in vertices],
+    }
+
+
+def _replay(vertices, edges, op, args):
+    if op == 'add_vertex':
+        vertices[args[0]] = list(args[1:])
+    elif op == 'add_edge':
+        edges[args[0]] = list(args[1:])
+    elif op == 'remove_vertex':
+        vertices.pop(args[0], None)
+    elif op == 'remove_edge':
+        edges.pop(args[0], None)
+    elif op == 'move':
+        if args[0] in vertices:
+            vertices[args[0]][0:2] = args[1:3]
+    elif op == 'color':
+        target = vertices.get(args[0]) or edges.get(args[0])
+        if target is not None:
+            target[-1] = args[1]
@@ -1,14 +1,22 @@
 import sys
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QGraphicsView, QToolBar, QAction,
-    QLabel, QDialog, QVBoxLayout, QTextEdit, QMessageBox
+    QLabel, QMessageBox, QInputDialog, QFileDialog
 )
 from PyQt5.QtCore import QTimer, QEvent
-from PyQt5.QtGui import QPainter
+from PyQt5.QtGui import QPainter, QKeySequence
 from graphscene import GraphScene
+from analysis_dialog import AnalysisDialog
 from vertex import Vertex
 from edge import Edge
 import graph_analysis as ga
+import graph_products as gp
+import sketch_io
+import journal
+
+MAX_PRODUCT_VERTICES = 200000
+MAX_PRODUCT_EDGES = 1000000
+AUTOSAVE_COMPACT_MS = 10000
 
 class GraphWindow(QMainWindow):
     def __init__(self):
@@ -19,6 +27,7 @@ class GraphWindow(QMainWindow):
         self.view = QGraphicsView(self.scene)
         self.setCentralWidget(self.view)
         self.view.setRenderHint(QPainter.Antialiasing)
+        self.view.setDragMode(QGraphicsView.RubberBandDrag)
         self.setStyleSheet("background-color: #333333;")
         self.view.setStyleSheet("background-color: #222222; border: none;")
 
@@ -36,13 +45,65 @@ class GraphWindow(QMainWindow):
         self.timer.start(30)
         self.scene.installEventFilter(self)
 
+        self.autosave_timer = QTimer()
+        self.autosave_timer.timeout.connect(self.compact_autosave)
+
+    def start_autosave(self):
+        """Offer to recover crashed sessions, then start journaling edits."""
+        recovered = False
+        for directory, lock in journal.orphaned_sessions():
+            if recovered:
+                lock.close()  # keep it to offer again next time
+                continue
+            try:
+                state = journal.recover(directory)
+            except (OSError, ValueError, KeyError, IndexError) as e:
+                QMessageBox.warning(self, "Error", f"Cannot recover session.\n{str(e)}")
+                state = None
+            if state and state['vertices']:
+                answer = QMessageBox.question(
+                    self, "Recover Session",
+                    f"GraphCraft did not shut down cleanly. Recover the autosaved graph "
+                    f"with {len(state['vertices'])} vertices?")
+                if answer == QMessageBox.Yes:
+                    self.scene.load_state(state)
+                    recovered = True
+            journal.discard_autosave(directory, lock)
+        try:
+            self.scene.journal = journal.Journal(self.scene.state())
+        except OSError as e:
+            QMessageBox.warning(self, "Error", f"Autosave is disabled.\n{str(e)}")
+            return
+        self.autosave_timer.start(AUTOSAVE_COMPACT_MS)
+        self.statusBar().showMessage(self._status_text())
+
+    def compact_autosave(self):
+        j = self.scene.journal
+        if j is not None and j.events_since_snapshot >= journal.COMPACT_EVENTS:
+            j.snapshot(self.scene.state())
+
+    def closeEvent(self, event):
+        if self.scene.journal is not None:
+            self.scene.journal.close(discard=True)
+            self.scene.journal = None
+        super().closeEvent(event)
+
     def _setup_toolbar(self, toolbar):
+        undo_act = self.scene.undo_stack.createUndoAction(self, "Undo")
+        undo_act.setShortcut(QKeySequence.Undo)
+        toolbar.addAction(undo_act)
+        redo_act = self.scene.undo_stack.createRedoAction(self, "Redo")
+        redo_act.setShortcut(QKeySequence.Redo)
+        toolbar.addAction(redo_act)
+
         actions = [
             ("Delete Vertex", self.delete_vertex),
             ("Delete Edge", self.delete_edge),
             ("Clear Scene", self.clear_scene),
+            ("Open Sketch", self.open_sketch),
+            ("Save Sketch", self.save_sketch),
             ("Pretty Layout", self.pretty_layout),
-            ("Cartesian Product", self.cartesian_product),
+            ("Graph Product", self.graph_product),
             ("Chromatic Polynomial", self.show_chromatic_polynomial),
             ("Run Dijkstra", self.run_dijkstra),
             ("Find MST", self.find_mst),
@@ -86,6 +147,11 @@ class GraphWindow(QMainWindow):
         self.bip_act.triggered.connect(self.toggle_bipartite)
         toolbar.addAction(self.bip_act)
 
+        self.sel_act = QAction("On Selection", self, checkable=True)
+        self.sel_act.setToolTip("Run analyses on the subgraph induced by the selection (Shift+drag to select)")
+        self.sel_act.triggered.connect(self.toggle_selection_only)
+        toolbar.addAction(self.sel_act)
+
         act = QAction("Analyze Graph", self)
         act.triggered.connect(self.analyze_graph)
         toolbar.addAction(act)
@@ -94,22 +160,13 @@ class GraphWindow(QMainWindow):
         return f"Vertices: {len(self.scene.vertices)} | Edges: {len(self.scene.edges)}"
 
     def delete_vertex(self):
-        for item in list(self.scene.selectedItems()):
-            if isinstance(item, Vertex):
-                for e in [e for e in self.scene.edges if e.vertex1 == item or e.vertex2 == item]:
-                    self.scene.removeItem(e)
-                self.scene.edges = [e for e in self.scene.edges if e.vertex1 != item and e.vertex2 != item]
-                self.scene.removeItem(item)
-                self.scene.vertices.remove(item)
-                if self.scene.edge_source == item:
-                    self.scene.edge_source = None
+        selected = [i for i in self.scene.selectedItems() if isinstance(i, Vertex)]
+        self.scene.delete_items(selected, "Delete Vertex")
         self.statusBar().showMessage(self._status_text())
 
     def delete_edge(self):
-        for item in list(self.scene.selectedItems()):
-            if isinstance(item, Edge):
-                self.scene.removeItem(item)
-                self.scene.edges.remove(item)
+        selected = [i for i in self.scene.selectedItems() if isinstance(i, Edge)]
+        self.scene.delete_items(selected, "Delete Edge")
         self.statusBar().showMessage(self._status_text())
 
     def clear_scene(self):
@@ -119,12 +176,72 @@ class GraphWindow(QMainWindow):
     def pretty_layout(self):
         self.scene.pretty_layout()
 
-    def cartesian_product(self):
-        self.scene.cartesian_product()
+    def open_sketch(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Open Sketch", "", sketch_io.SKETCH_FILTER)
+        if not path:
+            return
+        try:
+            pos, edges, directed = sketch_io.load_sketch(path)
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "Error", f"Cannot open sketch.\n{str(e)}")
+            return
+        self.scene.load_graph(pos, edges, directed)
+        self.statusBar().showMessage(self._status_text())
+
+    def save_sketch(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Save Sketch", "", sketch_io.SKETCH_FILTER)
+        if not path:
+            return
+        pos, edges, directed = ga.scene_arrays(self.scene)
+        try:
+            sketch_io.save_sketch(path, pos, edges, directed)
+        except OSError as e:
+            QMessageBox.warning(self, "Error", f"Cannot save sketch.\n{str(e)}")
+
+    def graph_product(self):
+        kind, ok = QInputDialog.getItem(self, "Graph Product", "Product:", list(gp.PRODUCTS), 0, False)
+        if not ok:
+            return
+        factors = ["Current Graph"] + list(gp.GENERATORS) + ["Sketch File..."]
+        factor, ok = QInputDialog.getItem(self, "Graph Product", "Second factor:", factors, 1, False)
+        if not ok:
+            return
+
+        if factor == "Current Graph":
+            pos, edges, _ = ga.scene_arrays(self.scene)
+            n_h = len(pos)
+        elif factor in gp.GENERATORS:
+            size, ok = QInputDialog.getInt(self, "Graph Product", "n:", 2, 1, 1000)
+            if not ok:
+                return
+            n_h, edges = gp.GENERATORS[factor](size)
+        else:
+            path, _ = QFileDialog.getOpenFileName(self, "Second Factor", "", sketch_io.SKETCH_FILTER)
+            if not path:
+                return
+            try:
+                pos, edges, _ = sketch_io.load_sketch(path)
+            except (OSError, ValueError) as e:
+                QMessageBox.warning(self, "Error", f"Cannot open sketch.\n{str(e)}")
+                return
+            n_h = len(pos)
+
+        power, ok = QInputDialog.getInt(self, "Graph Product", "Power:", 1, 1, 32)
+        if not ok:
+            return
+        pos_g, edges_g, directed = ga.scene_arrays(self.scene)
+        n, m = gp.power_size(kind, len(pos_g), edges_g, n_h, edges, power, directed)
+        if n > MAX_PRODUCT_VERTICES or m > MAX_PRODUCT_EDGES:
+            QMessageBox.warning(self, "Error",
+                                f"Product is too large to draw ({n} vertices, up to {m} edges).")
+            return
+        self.scene.graph_product(kind, n_h, edges, power)
         self.statusBar().showMessage(self._status_text())
 
     def show_chromatic_polynomial(self):
         poly = self.scene.chromatic_polynomial()
+        if poly is None:
+            return
         text = "\n".join([f"{k} colors: {v} valid colorings" for k, v in poly.items()])
         QMessageBox.information(self, "Chromatic Polynomial", text)
 
@@ -167,8 +284,9 @@ class GraphWindow(QMainWindow):
     def toggle_bipartite(self, checked):
         if checked:
             ok = self.scene.color_by_bipartite()
-            if not ok:
+            if ok is False:
                 QMessageBox.information(self, "Bipartite", "Graph is not bipartite.")
+            if not ok:
                 self.bip_act.setChecked(False)
         else:
             self.scene.reset_vertex_colors()
@@ -180,24 +298,16 @@ class GraphWindow(QMainWindow):
         self.scene.update_edges()
         self.statusBar().showMessage(self._status_text())
 
+    def toggle_selection_only(self, checked):
+        self.scene.selection_only = checked
+
     def analyze_graph(self):
-        G = ga.build_graph(self.scene)
+        view = self.scene.analysis_view()
+        if view is None:
+            return
+        G = view.to_networkx()
         info = ga.get_graph_info(G)
-        text = ga.format_info(info)
-
-        dlg = QDialog(self)
-        dlg.setWindowTitle("Graph Analysis")
-        dlg.resize(600, 400)
-
-        layout = QVBoxLayout(dlg)
-        te = QTextEdit(dlg)
-        te.setReadOnly(True)
-        te.setPlainText(text)
-        te.setStyleSheet("background-color: #222222; color: white; font-family: Consolas; font-size: 12pt;")
-        layout.addWidget(te)
-
-        dlg.setStyleSheet("background-color: #333333;")
-        dlg.exec_()
+        AnalysisDialog(G, info, self, labels=view.vertex_ids).exec_()
 
     def eventFilter(self, source, event):
         if event.type() in (QEvent.GraphicsSceneMouseMove, QEvent.GraphicsSceneMouseRelease):
@@ -209,6 +319,7 @@ def main():
     w = GraphWindow()
     w.resize(1000, 800)
     w.show()
+    w.start_autosave()
     sys.exit(app.exec_())
 
 if __name__ == "__main__":
@@ -0,0 +1,52 @@
+import json
+import os
+import networkx as nx
+import numpy as np
+import graph_analysis as ga
+
+SKETCH_FILTER = 'GraphCraft Sketch (*.json)'
+
+
+def save_sketch(path, positions, edges, directed=False):
+    """Write vertex positions and edge index pairs to a sketch file."""
+    data = {
+        'directed': bool(directed),
+        'vertices': np.asarray(positions, dtype=float).reshape(-1, 2).tolist(),
+        'edges': np.asarray(edges, dtype=np.int64).reshape(-1, 2).tolist(),
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+
+
+def load_sketch(path):
+    """Read a sketch file; returns (positions, edges, directed)."""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    positions = np.asarray(data.get('vertices', []), dtype=float).reshape(-1, 2)
+    edges = np.asarray(data.get('edges', []), dtype=np.int64).reshape(-1, 2)
+    return positions, edges, bool(data.get('directed', False))
+
+
+# NetworkX readers for the other graph formats the batch tools accept.
+READERS = {
+    '.graphml': nx.read_graphml,
+    '.gml': nx.read_gml,
+    '.edgelist': nx.read_edgelist,
+    '.txt': nx.read_edgelist,
+    '.adjlist': nx.read_adjlist,
+    '.g6': nx.read_graph6,
+}
+GRAPH_EXTENSIONS = ('.json',) + tuple(READERS)
+
+
+def read_graph(path):
+    """Read a sketch or NetworkX-readable file as a multigraph on 0..n-1."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.json':
+        positions, edges, directed = load_sketch(path)
+        return ga.graph_from_edges(len(positions), edges.tolist(), directed)
+    if ext not in READERS:
+        raise ValueError(f"Unsupported graph file: {path}")
+    G = READERS[ext](path)
+    G = nx.MultiDiGraph(G) if G.is_directed() else nx.MultiGraph(G)
+    return nx.convert_node_labels_to_integers(G)
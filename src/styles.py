@@ -0,0 +1,67 @@
+from PyQt5.QtGui import QPen, QBrush, QColor, QRadialGradient, QGradient
+from PyQt5.QtCore import Qt
+
+# Interned pens and brushes shared by every Vertex and Edge. Items hold
+# references to these instead of building their own, and since the same
+# style always yields the same object, items can skip no-op restyles with
+# an identity check.
+
+EDGE_WIDTH = 2
+SHADOW_OFFSET = 4
+SHADOW_SPREAD = 3
+
+_pens = {}
+_brushes = {}
+
+
+def _key(color):
+    return QColor(color).rgba()
+
+
+def pen(color, width=EDGE_WIDTH, role='edge'):
+    """Shared round-capped pen for (color, width, role)."""
+    key = (_key(color), width, role)
+    p = _pens.get(key)
+    if p is None:
+        p = QPen(QColor(color), width)
+        p.setCapStyle(Qt.RoundCap)
+        p.setJoinStyle(Qt.RoundJoin)
+        _pens[key] = p
+    return p
+
+
+def brush(color, role='fill'):
+    """Shared solid brush for (color, role)."""
+    key = (_key(color), role)
+    b = _brushes.get(key)
+    if b is None:
+        b = _brushes[key] = QBrush(QColor(color))
+    return b
+
+
+def _radial_brush(role, stops):
+    b = _brushes.get(role)
+    if b is None:
+        # Object-bounding coordinates let every ellipse share one gradient.
+        grad = QRadialGradient(0.5, 0.5, 0.5)
+        grad.setCoordinateMode(QGradient.ObjectBoundingMode)
+        for at, color in stops:
+            grad.setColorAt(at, color)
+        b = _brushes[role] = QBrush(grad)
+    return b
+
+
+def vertex_brush():
+    """Default light-to-dark blue vertex gradient."""
+    return _radial_brush('vertex', [(0, QColor("#add8e6")), (1, QColor("#0000ff"))])
+
+
+def shadow_brush():
+    """Soft drop shadow painted under vertices."""
+    return _radial_brush('shadow', [(0, QColor(0, 0, 0, 150)),
+                                    (0.7, QColor(0, 0, 0, 110)),
+                                    (1, QColor(0, 0, 0, 0))])
+
+
+def default_edge_pen():
+    return pen('black', EDGE_WIDTH, 'default')
@@ -1,20 +1,17 @@
-from PyQt5.QtWidgets import (
-    QGraphicsEllipseItem, QGraphicsTextItem, QGraphicsDropShadowEffect
-)
-from PyQt5.QtCore import QPointF
-from PyQt5.QtGui import QBrush, QRadialGradient, QColor
+from PyQt5.QtWidgets import QGraphicsEllipseItem, QGraphicsTextItem, QStyle, QStyleOptionGraphicsItem
+from PyQt5.QtCore import QPointF, Qt
+from PyQt5.QtGui import QPen
+import styles
 
 class Vertex(QGraphicsEllipseItem):
     def __init__(self, x, y, radius=20):
         super().__init__(x - radius, y - radius, 2 * radius, 2 * radius)
         self.radius = radius
 
-        # Original color (gradient blue)
-        grad = QRadialGradient(radius, radius, radius)
-        grad.setColorAt(0, QColor("#add8e6"))  # Light blue center
-        grad.setColorAt(1, QColor("#0000ff"))  # Dark blue edge
-        self.original_brush = QBrush(grad)
+        # Original color (gradient blue), shared by all vertices
+        self.original_brush = styles.vertex_brush()
         self.setBrush(self.original_brush)
+        self.applied_brush = self.original_brush
 
         # Track customized color separately
         self.custom_brush = None
@@ -25,27 +22,51 @@ class Vertex(QGraphicsEllipseItem):
             QGraphicsEllipseItem.ItemIsSelectable
         )
 
-        shadow = QGraphicsDropShadowEffect()
-        shadow.setBlurRadius(10)
-        shadow.setOffset(4, 4)
-        self.setGraphicsEffect(shadow)
-
         self.label_item = None
+        self.uid = None  # assigned by the scene, stable across undo/redo
+        self.logged_pos = None  # position last written to the autosave journal
         self.velocity = QPointF(0, 0)
         self.force = QPointF(0, 0)
 
+    def boundingRect(self):
+        grow = styles.SHADOW_OFFSET + styles.SHADOW_SPREAD
+        return super().boundingRect().adjusted(0, 0, grow, grow)
+
+    def paint(self, painter, option, widget=None):
+        # Painting the shadow directly avoids a QGraphicsEffect per vertex.
+        shadow = self.rect().adjusted(-styles.SHADOW_SPREAD, -styles.SHADOW_SPREAD,
+                                      styles.SHADOW_SPREAD, styles.SHADOW_SPREAD)
+        shadow.translate(styles.SHADOW_OFFSET, styles.SHADOW_OFFSET)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(styles.shadow_brush())
+        painter.drawEllipse(shadow)
+        # Qt would outline the whole bounding rect, shadow included, so the
+        # selection outline is drawn here around the ellipse only.
+        selected = option.state & QStyle.State_Selected
+        option = QStyleOptionGraphicsItem(option)
+        option.state &= ~QStyle.State_Selected
+        super().paint(painter, option, widget)
+        if selected:
+            pad = self.pen().widthF() / 2
+            painter.setPen(QPen(option.palette.windowText(), 0, Qt.DashLine))
+            painter.setBrush(Qt.NoBrush)
+            painter.drawRect(self.rect().adjusted(-pad, -pad, pad, pad))
+
     def get_center(self):
         r = self.rect()
         return QPointF(r.x() + r.width() / 2, r.y() + r.height() / 2)
 
     def set_color(self, color):
-        """Set a permanent custom color chosen by user (right-click)."""
-        self.custom_brush = QBrush(color)
+        """Set a permanent custom color chosen by user (right-click); None clears it."""
+        self.custom_brush = styles.brush(color) if color is not None else None
         self.update_brush()
 
+    def user_color(self):
+        return self.custom_brush.color() if self.custom_brush else None
+
     def set_temp_color(self, color):
         """Temporarily override the color for things like components."""
-        self.temp_brush = QBrush(color)
+        self.temp_brush = styles.brush(color)
         self.update_brush()
 
     def reset_temp_color(self):
@@ -57,16 +78,15 @@ class Vertex(QGraphicsEllipseItem):
         """Reset everything back to original gradient blue."""
         self.custom_brush = None
         self.temp_brush = None
-        self.setBrush(self.original_brush)
+        self.update_brush()
 
     def update_brush(self):
         """Decide which color to actually show based on priority."""
-        if self.temp_brush:
-            self.setBrush(self.temp_brush)
-        elif self.custom_brush:
-            self.setBrush(self.custom_brush)
-        else:
-            self.setBrush(self.original_brush)
+        brush = self.temp_brush or self.custom_brush or self.original_brush
+        # Brushes are interned, so an unchanged style is the very same object.
+        if brush is not self.applied_brush:
+            self.setBrush(brush)
+            self.applied_brush = brush
 
     def set_label(self, text):
         if not self.label_item: